@@ -5,11 +5,21 @@ Web3 Promotion Hub Bot v2.1
 - Proper error handling and logging
 """
 
+import asyncio
 import logging
 import os
 import sqlite3
-import requests
+import time
+import warnings
+from datetime import timedelta
+from types import MappingProxyType
+from contextlib import asynccontextmanager
+from functools import partial
+import aiohttp
+import aiosqlite
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter
+from telegram.warnings import PTBDeprecationWarning
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -23,8 +33,22 @@ from dotenv import load_dotenv
 # Configuration
 load_dotenv()
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-ADMIN_IDS = [int(id) for id in os.getenv('ADMIN_IDS', '').split(',') if id]
+ADMIN_IDS = frozenset(
+    int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip()
+)
+SEND_RATE = 25  # outbound messages/s; Telegram allows ~30 msg/s per bot
+SEND_CONCURRENCY = 25  # sends awaiting Telegram's response at once
 COINGECKO_API = "https://api.coingecko.com/api/v3"
+# CoinGecko ids shown by /trends, mapped to their ticker symbols
+TOP_COINS = MappingProxyType({
+    'bitcoin': 'BTC',
+    'ethereum': 'ETH',
+    'tether': 'USDT',
+    'binancecoin': 'BNB',
+    'solana': 'SOL',
+})
+TRENDS_TTL = 60  # seconds; CoinGecko's public API allows ~10-30 calls/min
+TRENDS_LOCK = asyncio.Lock()
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
@@ -32,54 +56,195 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Database setup
+# Hot queries live in module constants so the connection's statement
+# cache hands back the already-compiled statement on every call.
+SQL_INSERT_VOTE = 'INSERT INTO votes (user_id, project_id) VALUES (?, ?)'
+SQL_TOP_PROJECTS = 'SELECT id, name, votes FROM projects ORDER BY votes DESC LIMIT 10'
+SQL_WALLETS = 'SELECT coin, address FROM wallets'
+SQL_INSERT_SERVICE = 'INSERT INTO services (user_id, service_type, description) VALUES (?, ?, ?)'
+
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+"""
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS projects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        votes INTEGER DEFAULT 0,
+        submitted_by INTEGER,
+        submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Lets the top-10 query walk the index instead of sorting the table
+    CREATE INDEX IF NOT EXISTS idx_projects_votes ON projects(votes DESC);
+
+    CREATE TABLE IF NOT EXISTS services (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        service_type TEXT NOT NULL,
+        description TEXT,
+        price TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        post_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS votes (
+        user_id INTEGER NOT NULL,
+        project_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, project_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS wallets (
+        coin TEXT PRIMARY KEY,
+        address TEXT NOT NULL
+    );
+
+    -- Keep projects.votes in step with votes inside the INSERT itself
+    CREATE TRIGGER IF NOT EXISTS bump_votes AFTER INSERT ON votes
+    BEGIN
+        UPDATE projects SET votes = votes + 1 WHERE id = NEW.project_id;
+    END;
+"""
+
+# A single shared aiosqlite connection (opened in post_init and kept in
+# bot_data['db']) runs queries on its own thread so handlers never block
+# the event loop, while keeping the page and statement caches warm.
+DB_PATH = 'web3_bot.db'
+DB_RETRIES = 5
+VOTE_BATCH_WINDOW = 0.05  # seconds of votes collected into one transaction
+SHUTDOWN_DRAIN_TIMEOUT = 10  # seconds to flush queued work on stop
+# Reply per vote outcome: counted, duplicate, or failed to store
+VOTE_REPLIES = {
+    True: "✅ Your vote has been counted! Project ranking updated.",
+    False: "⚠️ You've already voted for this project!",
+    None: "⚠️ Failed to process your vote. Please try again.",
+}
+DB_WRITE_LOCK = asyncio.Lock()
+TOP10_LOCK = asyncio.Lock()
+
+
+async def open_db() -> aiosqlite.Connection:
+    """Open the shared database connection"""
+    db = await aiosqlite.connect(
+        DB_PATH,
+        timeout=30,
+        isolation_level=None,
+        cached_statements=256
+    )
+    # Handlers unpack plain tuples; keep sqlite3.Row's per-row overhead out
+    db.row_factory = None
+    return db
+
+
+@asynccontextmanager
+async def transaction(db: aiosqlite.Connection):
+    """Explicit write transaction on the shared connection"""
+    async with DB_WRITE_LOCK:
+        await db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            await db.execute('ROLLBACK')
+            raise
+        await db.execute('COMMIT')
 
 
-def init_db():
-    """Initialize the database with required tables"""
-    with sqlite3.connect('web3_bot.db') as conn:
-        conn.executescript('''
-        CREATE TABLE IF NOT EXISTS projects (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            votes INTEGER DEFAULT 0,
-            submitted_by INTEGER,
-            submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS services (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            service_type TEXT NOT NULL,
-            description TEXT,
-            price TEXT,
-            is_active BOOLEAN DEFAULT 1,
-            post_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS votes (
-            user_id INTEGER NOT NULL,
-            project_id INTEGER NOT NULL,
-            PRIMARY KEY (user_id, project_id)
-        );
-        
-        CREATE TABLE IF NOT EXISTS wallets (
-            coin TEXT PRIMARY KEY,
-            address TEXT NOT NULL
-        );
-        ''')
-
-        # Insert sample wallets if empty
-        if not conn.execute('SELECT 1 FROM wallets LIMIT 1').fetchone():
-            conn.executemany(
+async def retry_locked(operation):
+    """Await operation(), backing off while the DB is locked"""
+    for attempt in range(DB_RETRIES):
+        try:
+            return await operation()
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) or attempt == DB_RETRIES - 1:
+                raise
+            await asyncio.sleep(0.05 * 2 ** attempt)
+
+
+async def db_write(db: aiosqlite.Connection, sql: str, params=()):
+    """Run a write in its own transaction, backing off while the DB is locked"""
+    async def write():
+        async with transaction(db) as conn:
+            await conn.execute(sql, params)
+
+    await retry_locked(write)
+
+
+async def write_votes(db: aiosqlite.Connection, votes: list) -> list:
+    """Insert a batch of (user_id, project_id) votes in one transaction.
+
+    Returns one bool per vote: False if that user had already voted.
+    """
+    async with transaction(db) as conn:
+        await conn.execute('SAVEPOINT vote_batch')
+        try:
+            await conn.executemany(SQL_INSERT_VOTE, votes)
+            await conn.execute('RELEASE vote_batch')
+            return [True] * len(votes)
+        except sqlite3.IntegrityError:
+            await conn.execute('ROLLBACK TO vote_batch')
+            await conn.execute('RELEASE vote_batch')
+
+        # A duplicate is in the batch: fall back to row-by-row inserts
+        results = []
+        for vote in votes:
+            try:
+                await conn.execute(SQL_INSERT_VOTE, vote)
+                results.append(True)
+            except sqlite3.IntegrityError:
+                results.append(False)
+        return results
+
+
+async def vote_writer(app: Application):
+    """Store votes arriving within VOTE_BATCH_WINDOW in one transaction, then queue the replies"""
+    bot_data = app.bot_data
+    queue = bot_data['vote_q']
+    while True:
+        batch = [await queue.get()]
+        await asyncio.sleep(VOTE_BATCH_WINDOW)
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+
+        try:
+            try:
+                results = await retry_locked(partial(write_votes, bot_data['db'], batch))
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Vote processing error: %s", e)
+                results = [None] * len(batch)
+
+            if any(results):
+                bot_data.pop('top10_markup', None)
+            for (user_id, _), counted in zip(batch, results):
+                await bot_data['send_q'].put(
+                    partial(app.bot.send_message, user_id, VOTE_REPLIES[counted])
+                )
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def init_db(db: aiosqlite.Connection):
+    """Apply connection pragmas and initialize the database with required tables"""
+    await db.executescript(PRAGMAS + SCHEMA)
+
+    # Insert sample wallets if empty
+    async with transaction(db) as conn:
+        async with conn.execute('SELECT 1 FROM wallets LIMIT 1') as cur:
+            empty = await cur.fetchone() is None
+        if empty:
+            await conn.executemany(
                 'INSERT INTO wallets VALUES (?, ?)',
                 [('BTC', '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'),
                  ('ETH', '0x742d35Cc6634C0532925a3b844Bc454e4438f44e')]
             )
 
 
-# Service categories
-SERVICE_TYPES = {
+# Service categories (read-only)
+SERVICE_TYPES = MappingProxyType({
     'shilling': "📢 Shilling Services",
     'hype': "🚀 Organic Hype Building",
     'mod': "🛡️ Community Moderation",
@@ -87,33 +252,103 @@ SERVICE_TYPES = {
     'dev': "💻 Web3 Development",
     'design': "🎨 NFT/Web3 Design",
     'other': "🔮 Other Web3 Services"
-}
+})
+
+# Keyboards never change at runtime, so build them once and reuse them
+SERVICE_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton(text, callback_data=f'service_{key}')]
+    for key, text in SERVICE_TYPES.items()
+])
+START_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 Vote Projects", callback_data='vote_menu'),
+     InlineKeyboardButton("📈 Market Trends", callback_data='trends')],
+    [InlineKeyboardButton("🛍️ Offer Services", callback_data='service_menu'),
+     InlineKeyboardButton("🔍 Find Services", callback_data='find_services')],
+    [InlineKeyboardButton("🔑 Wallet Addresses", callback_data='wallets')]
+])
+
+# ======================
+# OUTBOUND QUEUE
+# ======================
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    """RetryAfter.retry_after in seconds; PTB 22 returns an int or a timedelta"""
+    with warnings.catch_warnings():
+        # Both return types are handled, so the int deprecation notice is noise
+        warnings.simplefilter('ignore', PTBDeprecationWarning)
+        retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+async def send_worker(queue: asyncio.Queue):
+    """Start queued sends at SEND_RATE so bursts never hit Telegram's flood limit"""
+    loop = asyncio.get_running_loop()
+    interval = 1 / SEND_RATE
+    slots = asyncio.Semaphore(SEND_CONCURRENCY)
+    in_flight = set()
+    resume_at = 0.0  # shared flood-wait deadline set by any RetryAfter
+
+    async def deliver(send):
+        nonlocal resume_at
+        flooded = False
+        try:
+            await send()
+        except RetryAfter as e:
+            flooded = True
+            resume_at = max(resume_at, loop.time() + _retry_seconds(e))
+            logger.warning("Flood limit hit; pausing sends for %.0fs", resume_at - loop.time())
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Failed to deliver queued message: %s", e)
+        finally:
+            slots.release()
+        try:
+            if flooded:
+                # Requeue (after freeing the slot, so the worker can't deadlock on it)
+                await queue.put(send)
+        finally:
+            queue.task_done()
+
+    while True:
+        send = await queue.get()
+        await slots.acquire()
+        pause = resume_at - loop.time()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        # Each send runs as its own task so a slow round-trip doesn't lower the rate
+        task = asyncio.create_task(deliver(send))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        await asyncio.sleep(interval)
+
+
+async def enqueue_send(context: ContextTypes.DEFAULT_TYPE, send):
+    """Queue a zero-argument coroutine function for the send worker"""
+    await context.bot_data['send_q'].put(send)
 
 # ======================
 # SERVICE FUNCTIONS
 # ======================
 
 
-async def submit_service(context: ContextTypes.DEFAULT_TYPE, user_id: int, service_type: str, description: str):
+async def submit_service(context: ContextTypes.DEFAULT_TYPE, user_id: int, username: str | None,
+                         service_type: str, description: str):
     """Store service in database and notify admins"""
-    with sqlite3.connect('web3_bot.db') as conn:
-        conn.execute(
-            'INSERT INTO services (user_id, service_type, description) VALUES (?, ?, ?)',
-            (user_id, service_type, description)
-        )
+    await db_write(context.bot_data['db'], SQL_INSERT_SERVICE, (user_id, service_type, description))
+
+    # Only real usernames get an @; bare ids are not valid mentions
+    sender = f"@{username}" if username else f"user id {user_id}"
+    text = (
+        f"🆕 New Service Submission:\n\n"
+        f"Type: {SERVICE_TYPES.get(service_type, service_type)}\n"
+        f"From: {sender}\n"
+        f"Details: {description[:1000]}"
+    )
 
-    # Notify all admins
     for admin_id in ADMIN_IDS:
-        try:
-            await context.bot.send_message(
-                admin_id,
-                f"🆕 New Service Submission:\n\n"
-                f"Type: {SERVICE_TYPES.get(service_type, service_type)}\n"
-                f"From: @{context.bot.get_chat(user_id).username}\n"
-                f"Details: {description[:1000]}"
-            )
-        except Exception as e:  # pylint: disable=broad-except
-            logger.error("Failed to notify admin %d: %s", admin_id, e)
+        await enqueue_send(context, partial(context.bot.send_message, admin_id, text))
 
 # ======================
 # BUTTON HANDLERS
@@ -126,38 +361,37 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     data = query.data
-    user_id = query.from_user.id
-
-    if data.startswith('vote_'):
-        project_id = int(data[5:])
-        await process_vote(context, user_id, project_id)
-    elif data.startswith('service_'):
-        service_type = data[8:]
-        await query.edit_message_text(
-            f"✍️ Describe your {SERVICE_TYPES[service_type]}:\n\n"
-            "Example: \"I provide Twitter shilling for new NFT projects with 10K+ follower network\"\n\n"
-            "Type your description now:"
-        )
-        context.user_data['awaiting_service'] = service_type
-    elif data == 'service_menu':
-        await show_service_menu(query)
-    elif data == 'vote_menu':
-        await vote_project(update, context)
-    elif data == 'trends':
-        await crypto_trends(update, context)
-    elif data == 'wallets':
-        await show_wallets(update, context)
+    handler = EXACT_CALLBACKS.get(data)
+    if handler is not None:
+        await handler(update, context)
+        return
+
+    prefix, _, arg = data.partition('_')
+    handler = PREFIX_CALLBACKS.get(prefix)
+    if handler is not None:
+        await handler(update, context, arg)
+
+
+async def vote_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, arg: str):
+    """Handle a vote_<project_id> button"""
+    await process_vote(context, update.callback_query.from_user.id, int(arg))
+
+
+async def service_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, service_type: str):
+    """Handle a service_<type> button by prompting for a description"""
+    await update.callback_query.edit_message_text(
+        f"✍️ Describe your {SERVICE_TYPES[service_type]}:\n\n"
+        "Example: \"I provide Twitter shilling for new NFT projects with 10K+ follower network\"\n\n"
+        "Type your description now:"
+    )
+    context.user_data['awaiting_service'] = service_type
 
 
 async def show_service_menu(query):
     """Display service type selection"""
-    keyboard = [
-        [InlineKeyboardButton(text, callback_data=f'service_{key}')]
-        for key, text in SERVICE_TYPES.items()
-    ]
     await query.edit_message_text(
         "🎯 Select your service type:",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        reply_markup=SERVICE_MENU_MARKUP
     )
 
 # ======================
@@ -174,7 +408,7 @@ async def handle_service_description(update: Update, context: ContextTypes.DEFAU
     description = update.message.text
     user = update.effective_user
 
-    await submit_service(context, user.id, service_type, description)
+    await submit_service(context, user.id, user.username, service_type, description)
     del context.user_data['awaiting_service']
     await update.message.reply_text("✅ Service submitted to admins!")
 
@@ -184,32 +418,12 @@ async def handle_service_description(update: Update, context: ContextTypes.DEFAU
 
 
 async def process_vote(context: ContextTypes.DEFAULT_TYPE, user_id: int, project_id: int):
-    """Record a vote in database"""
-    with sqlite3.connect('web3_bot.db') as conn:
-        try:
-            conn.execute(
-                'INSERT INTO votes (user_id, project_id) VALUES (?, ?)',
-                (user_id, project_id)
-            )
-            conn.execute(
-                'UPDATE projects SET votes = votes + 1 WHERE id = ?',
-                (project_id,)
-            )
-            await context.bot.send_message(
-                user_id,
-                "✅ Your vote has been counted! Project ranking updated."
-            )
-        except sqlite3.IntegrityError:
-            await context.bot.send_message(
-                user_id,
-                "⚠️ You've already voted for this project!"
-            )
-        except Exception as e:  # pylint: disable=broad-except
-            logger.error("Vote processing error: %s", e)
-            await context.bot.send_message(
-                user_id,
-                "⚠️ Failed to process your vote. Please try again."
-            )
+    """Queue a vote for vote_writer, which records it and replies to the voter.
+
+    The handler returns straight away so the next update can be processed
+    while the batch window is open.
+    """
+    await context.bot_data['vote_q'].put((user_id, project_id))
 
 # ======================
 # CORE COMMANDS
@@ -218,13 +432,6 @@ async def process_vote(context: ContextTypes.DEFAULT_TYPE, user_id: int, project
 
 async def start(update: Update, _: ContextTypes.DEFAULT_TYPE):
     """Enhanced welcome message with all features"""
-    keyboard = [
-        [InlineKeyboardButton("📊 Vote Projects", callback_data='vote_menu'),
-         InlineKeyboardButton("📈 Market Trends", callback_data='trends')],
-        [InlineKeyboardButton("🛍️ Offer Services", callback_data='service_menu'),
-         InlineKeyboardButton("🔍 Find Services", callback_data='find_services')],
-        [InlineKeyboardButton("🔑 Wallet Addresses", callback_data='wallets')]
-    ]
     await update.message.reply_text(
         "🌐 Web3 Promotion Hub\n\n"
         "1. Vote for projects ↗️\n"
@@ -232,109 +439,231 @@ async def start(update: Update, _: ContextTypes.DEFAULT_TYPE):
         "3. Offer/find services 💼\n"
         "4. View official wallets 🔐\n\n"
         "Choose an option:",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        reply_markup=START_MARKUP
     )
 
 
-async def crypto_trends(update: Update, _: ContextTypes.DEFAULT_TYPE):
-    """Get top 5 trending coins with price changes"""
-    try:
-        response = requests.get(
-            f"{COINGECKO_API}/coins/markets",
-            params={
-                'vs_currency': 'usd',
-                'order': 'market_cap_desc',
-                'per_page': 5,
-                'price_change_percentage': '24h'
-            },
-            timeout=10
-        )
+async def fetch_trends(http: aiohttp.ClientSession) -> str:
+    """Fetch top 5 coins from CoinGecko and format the trends message"""
+    async with http.get(
+        f"{COINGECKO_API}/simple/price",
+        params={
+            'ids': ','.join(TOP_COINS),
+            'vs_currencies': 'usd',
+            'include_24hr_change': 'true'
+        },
+        timeout=aiohttp.ClientTimeout(total=10)
+    ) as response:
         response.raise_for_status()
+        prices = await response.json()
 
-        trends = [
-            f"{coin['symbol'].upper()}: ${coin['current_price']:,} "
-            f"({coin['price_change_percentage_24h']:+.1f}%)"
-            for coin in response.json()
-        ]
+    return "🔥 Top 5 Cryptocurrencies:\n\n" + "\n".join(
+        _format_price(symbol, prices[coin_id])
+        for coin_id, symbol in TOP_COINS.items()
+        if (prices.get(coin_id) or {}).get('usd') is not None
+    ) + "\n\n📊 24h price change"
 
-        await update.message.reply_text(
-            "🔥 Top 5 Cryptocurrencies:\n\n" + "\n".join(trends) +
-            "\n\n📊 24h price change"
-        )
-    except requests.RequestException as e:
+
+def _format_price(symbol: str, price: dict) -> str:
+    """One trends line; /simple/price may omit or null the 24h change"""
+    change = price.get('usd_24h_change')
+    if change is None:
+        return f"{symbol}: ${price['usd']:,} (n/a)"
+    return f"{symbol}: ${price['usd']:,} ({change:+.1f}%)"
+
+
+async def _store_trends(bot_data: dict):
+    """Fetch trends and cache the rendered message in bot_data.
+
+    On failure the last good message is kept, and the attempt time is still
+    recorded so an outage costs at most one API call per TRENDS_TTL.
+    """
+    try:
+        bot_data['trends_text'] = await fetch_trends(bot_data['http'])
+    except (aiohttp.ClientError, asyncio.TimeoutError, AttributeError, TypeError, ValueError) as e:
+        # The last three cover an unexpected payload shape
         logger.error("Trends API error: %s", e)
-        await update.message.reply_text(
+    finally:
+        bot_data['trends_ts'] = time.monotonic()
+
+
+def _trends_stale(bot_data: dict) -> bool:
+    """Whether the last trends fetch attempt is missing or older than TRENDS_TTL"""
+    return time.monotonic() - bot_data.get('trends_ts', float('-inf')) > TRENDS_TTL
+
+
+async def refresh_trends(context: ContextTypes.DEFAULT_TYPE):
+    """Refresh the cached trends message (runs on the job queue)"""
+    async with TRENDS_LOCK:
+        await _store_trends(context.bot_data)
+
+
+async def crypto_trends(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Get top 5 trending coins with price changes"""
+    if context.job_queue is None and _trends_stale(context.bot_data):
+        # Without the job queue nothing refreshes in the background, so the
+        # first tap after TRENDS_TTL fetches; the lock keeps a burst of taps
+        # down to a single API call.
+        async with TRENDS_LOCK:
+            if _trends_stale(context.bot_data):
+                await _store_trends(context.bot_data)
+
+    text = context.bot_data.get('trends_text')
+    if text is None:
+        text = (
             "⚠️ Couldn't fetch trends. Try again later.\n"
             "Meanwhile check /wallets or /vote"
         )
+    await enqueue_send(context, partial(update.effective_message.reply_text, text))
 
 
-async def vote_project(update: Update, _: ContextTypes.DEFAULT_TYPE):
-    """Show voting interface"""
-    with sqlite3.connect('web3_bot.db') as conn:
-        projects = conn.execute(
-            '''SELECT id, name, votes 
-            FROM projects 
-            ORDER BY votes DESC 
-            LIMIT 10'''
-        ).fetchall()
+async def _render_top10(db: aiosqlite.Connection) -> InlineKeyboardMarkup | None:
+    """Build the voting keyboard for the current top 10 projects"""
+    async with db.execute(SQL_TOP_PROJECTS) as cur:
+        projects = await cur.fetchmany(10)
 
     if not projects:
-        await update.message.reply_text(
+        return None
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"{name} (👍 {votes})",
+                              callback_data=f'vote_{project_id}')]
+        for project_id, name, votes in projects
+    ])
+
+
+async def top10_markup(bot_data: dict) -> InlineKeyboardMarkup | None:
+    """Cached voting keyboard; vote_writer drops it after each batch of new votes"""
+    markup = bot_data.get('top10_markup')
+    if markup is None:
+        async with TOP10_LOCK:
+            markup = bot_data.get('top10_markup')
+            if markup is None:
+                # Holding the write lock means no vote transaction is open on the
+                # shared connection, and vote_writer's invalidation (after its
+                # commit) can't land between this read and the store below.
+                async with DB_WRITE_LOCK:
+                    markup = await _render_top10(bot_data['db'])
+                    if markup is not None:
+                        bot_data['top10_markup'] = markup
+    return markup
+
+
+async def vote_project(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show voting interface"""
+    markup = await top10_markup(context.bot_data)
+    if markup is None:
+        await update.effective_message.reply_text(
             "📭 No projects available for voting yet!\n"
             "Admins can add projects with /addproject"
         )
         return
 
-    keyboard = [
-        [InlineKeyboardButton(f"{name} (👍 {votes})",
-                              callback_data=f'vote_{id}')]
-        for id, name, votes in projects
-    ]
-    await update.message.reply_text(
+    await update.effective_message.reply_text(
         "🗳️ Vote for Web3 Projects\n"
         "Community-ranked top 10:",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        reply_markup=markup
     )
 
 
 async def promote_service(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Service submission with categories"""
     if not context.args:
-        keyboard = [
-            [InlineKeyboardButton(text, callback_data=f'service_{key}')]
-            for key, text in SERVICE_TYPES.items()
-        ]
         await update.message.reply_text(
             "🎯 Select your service type:",
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            reply_markup=SERVICE_MENU_MARKUP
         )
         return
 
-    await submit_service(context, update.effective_user.id, 'custom', ' '.join(context.args))
+    user = update.effective_user
+    await submit_service(context, user.id, user.username, 'custom', ' '.join(context.args))
     await update.message.reply_text("✅ Service submitted to admins!")
 
 
-async def show_wallets(update: Update, _: ContextTypes.DEFAULT_TYPE):
-    """Display verified wallet addresses"""
-    with sqlite3.connect('web3_bot.db') as conn:
-        wallets = conn.execute('SELECT coin, address FROM wallets').fetchall()
+async def _refresh_wallets_cache(bot_data: dict):
+    """Render the wallets message once; call again whenever wallets change"""
+    async with bot_data['db'].execute(SQL_WALLETS) as cur:
+        wallets = await cur.fetchall()
 
-    response = "🔐 Verified Wallets:\n\n" + "\n".join(
+    bot_data['wallets_text'] = "🔐 Verified Wallets:\n\n" + "\n".join(
         f"{coin}: <code>{address}</code>"
         for coin, address in wallets
     )
-    await update.message.reply_text(response, parse_mode='HTML')
+
+
+async def show_wallets(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Display verified wallet addresses"""
+    await update.effective_message.reply_text(context.bot_data['wallets_text'], parse_mode='HTML')
+
+
+# Callback data dispatch: exact matches are checked first so that
+# 'vote_menu' / 'service_menu' never reach the prefix handlers.
+EXACT_CALLBACKS = {
+    'service_menu': lambda update, _: show_service_menu(update.callback_query),
+    'vote_menu': vote_project,
+    'trends': crypto_trends,
+    'wallets': show_wallets,
+}
+PREFIX_CALLBACKS = {
+    'vote': vote_callback,
+    'service': service_callback,
+}
 
 # ======================
 # MAIN BOT SETUP
 # ======================
 
 
+async def post_init(app: Application):
+    """Open the shared database connection and HTTP session once the event loop is running"""
+    db = await open_db()
+    await init_db(db)
+    app.bot_data['db'] = db
+    await _refresh_wallets_cache(app.bot_data)
+    # Reused for every outbound API call so TCP/TLS connections stay alive
+    app.bot_data['http'] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=75)
+    )
+    app.bot_data['send_q'] = asyncio.Queue(maxsize=5000)
+    app.bot_data['send_worker'] = asyncio.create_task(send_worker(app.bot_data['send_q']))
+    app.bot_data['vote_q'] = asyncio.Queue()
+    app.bot_data['vote_writer'] = asyncio.create_task(vote_writer(app))
+    if app.job_queue is not None:
+        app.job_queue.run_repeating(refresh_trends, interval=TRENDS_TTL, first=0)
+
+
+async def post_stop(app: Application):
+    """Flush queued votes and messages while the bot can still send, then stop the workers"""
+    # Votes first: storing them queues the voters' replies
+    for queue_key, worker_key, what in (('vote_q', 'vote_writer', 'votes'),
+                                        ('send_q', 'send_worker', 'messages')):
+        queue = app.bot_data[queue_key]
+        try:
+            await asyncio.wait_for(queue.join(), SHUTDOWN_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping with %d queued %s dropped", queue.qsize(), what)
+        app.bot_data.pop(worker_key).cancel()
+
+
+async def post_shutdown(app: Application):
+    """Close the shared database connection and HTTP session"""
+    http = app.bot_data.pop('http', None)
+    if http is not None:
+        await http.close()
+    db = app.bot_data.pop('db', None)
+    if db is not None:
+        await db.close()
+
+
 def main():
     """Initialize and run the bot"""
-    init_db()
-    app = Application.builder().token(TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Command handlers
     app.add_handler(CommandHandler("start", start))